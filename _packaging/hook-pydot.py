@@ -11,9 +11,10 @@
 # ------------------------------------------------------------------
 # Adapted for Gaphor and Pydot by Arjan Molenaar
 
-import glob
+import fnmatch
 import os
 import shutil
+from pathlib import Path
 
 from PyInstaller.compat import is_darwin, is_win
 from PyInstaller.depend.bindepend import findLibrary
@@ -54,20 +55,34 @@ if is_win:
         "vcruntime140_1.dll",
     ]
 
-    binaries.extend((f"C:/Program Files/Graphviz/bin/{f}", "graphviz") for f in files)
+    # Enumerate the Graphviz bin folder once and pick what we need from
+    # the listing, instead of hitting the filesystem per pattern.
+    graphviz_bin = Path("C:/Program Files/Graphviz/bin")
+    listing = (
+        {p.name: str(p) for p in graphviz_bin.iterdir()}
+        if graphviz_bin.is_dir()
+        else {}
+    )
+
+    binaries.extend((listing.get(f, f"{graphviz_bin}/{f}"), "graphviz") for f in files)
 
     # Instead of copying the config file, what we should really do
     # is call `dot -c` on our new plugins folder.
     datas.extend(
-        (data, "graphviz")
-        for data in glob.glob("C:/Program Files/Graphviz/bin/config*")
+        (path, "graphviz")
+        for name, path in listing.items()
+        if name.startswith("config")
     )
 
 else:
+    dot_path = shutil.which("dot")
+    if dot_path is None:
+        raise FileNotFoundError("Graphviz 'dot' binary not found in PATH")
+
     if is_darwin:
         # The dot binary in PATH is typically a symlink, handle that.
         # graphviz_bindir is e.g. /usr/local/Cellar/graphviz/2.46.0/bin
-        graphviz_bindir = os.path.dirname(os.path.realpath(shutil.which("dot")))  # type: ignore[type-var]
+        graphviz_bindir = os.path.dirname(os.path.realpath(dot_path))
 
         suffix = "dylib"
         # graphviz_libdir is e.g. /usr/local/Cellar/graphviz/2.46.0/lib/graphviz
@@ -75,7 +90,7 @@ else:
     else:
         # Do not resolve symlinks: on Ubuntu Bionic, the symlink is
         # /usr/bin/dot -> ../sbin/libgvc6-config-update
-        graphviz_bindir = os.path.dirname(shutil.which("dot"))  # type: ignore[type-var]
+        graphviz_bindir = os.path.dirname(dot_path)
 
         suffix = "so.?"
         # graphviz_libdir is e.g. /usr/lib64/graphviz
@@ -84,10 +99,12 @@ else:
         )
 
     binaries.extend((f"{graphviz_bindir}/{binary}", ".") for binary in progs)
-    binaries.extend(
-        (binary, "graphviz")
-        for binary in glob.glob(f"{graphviz_libdir}/*.{suffix}")
-        if required_plugin(binary)
-    )
 
-    datas.extend((data, "graphviz") for data in glob.glob(f"{graphviz_libdir}/config*"))
+    # One scandir over the plugin folder replaces the two glob passes.
+    if os.path.isdir(graphviz_libdir):
+        for entry in os.scandir(graphviz_libdir):
+            name = entry.name
+            if fnmatch.fnmatch(name, f"*.{suffix}") and required_plugin(name):
+                binaries.append((entry.path, "graphviz"))
+            elif name.startswith("config"):
+                datas.append((entry.path, "graphviz"))
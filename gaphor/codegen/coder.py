@@ -24,6 +24,8 @@ from __future__ import annotations
 
 import argparse
 import contextlib
+import functools
+import io
 import logging
 import sys
 import textwrap
@@ -103,11 +105,17 @@ def main(
     )
     overrides = Overrides(overridesfile) if overridesfile else None
 
-    with open(outfile, "w", encoding="utf-8") if outfile else contextlib.nullcontext(
-        sys.stdout
-    ) as out:  # type: ignore[attr-defined]
-        for line in coder(model, super_models, overrides):
-            print(line, file=out)
+    buffer = io.StringIO()
+    for line in coder(model, super_models, overrides):
+        buffer.write(line)
+        buffer.write("\n")
+
+    # newline="" leaves the newlines alone, so the document is written
+    # with one write call instead of a translating write per line.
+    with open(
+        outfile, "w", encoding="utf-8", newline=""
+    ) if outfile else contextlib.nullcontext(sys.stdout) as out:  # type: ignore[attr-defined]
+        out.write(buffer.getvalue())
 
 
 def load_model(modelfile: str, modeling_language: ModelingLanguage) -> ElementFactory:
@@ -128,11 +136,27 @@ def load_modeling_language(lang) -> ModelingLanguage:
     return initialize("gaphor.modelinglanguages", [lang])[lang]
 
 
+def _clear_caches() -> None:
+    """Drop memoized model lookups, so another model can be generated."""
+    _bases_cache.clear()
+    is_simple_type.cache_clear()
+    _attribute_cached.cache_clear()
+    _in_profile_cache.clear()
+    _redefines_cache.clear()
+    _owned_attributes_by_name.cache_clear()
+    _sorted_attributes_cache.clear()
+    _sorted_operations_cache.clear()
+    _enumerations_cache.clear()
+    _full_names.clear()
+
+
 def coder(
     model: ElementFactory,
     super_models: list[tuple[ModelingLanguage, ElementFactory]],
     overrides: Overrides | None,
 ) -> Iterable[str]:
+    _clear_caches()
+
     classes = list(
         order_classes(
             c
@@ -149,80 +173,105 @@ def coder(
         yield overrides.header
 
     already_imported = set()
-    for c in classes:
-        if overrides and overrides.has_override(c.name):
-            yield overrides.get_override(c.name)
-            continue
+    declarations: list[str] = []
+    operation_defs: list[str] = []
+    association_defs: list[str] = []
 
-        element_type, cls = in_super_model(c.name, super_models)
-        if element_type and cls:
-            line = f"from {element_type.__module__} import {element_type.__name__}"
-            yield line
-            already_imported.add(line)
-            continue
-
-        yield class_declaration(c)
-        if properties := list(variables(c, overrides)):
-            yield from (f"    {p}" for p in properties)
+    # A single pass over the classes fills all three sections, so each
+    # class's attributes are only fetched once.
+    for c in classes:
+        if overrides and (override := overrides.get_override(c.name)) is not None:
+            declarations.append(override)
         else:
-            yield "    pass"
-        yield ""
-        yield ""
+            element_type, cls = in_super_model(c.name, super_models)
+            if element_type and cls:
+                line = f"from {element_type.__module__} import {element_type.__name__}"
+                declarations.append(line)
+                already_imported.add(line)
+            else:
+                declarations.append(class_declaration(c))
+                if properties := list(variables(c, overrides)):
+                    declarations.extend(f"    {p}" for p in properties)
+                else:
+                    declarations.append("    pass")
+                declarations.append("")
+                declarations.append("")
 
-    for c in classes:
-        yield from operations(c, overrides)
+        operation_defs.extend(operations(c, overrides))
+        association_defs.extend(associations(c, overrides))
+        association_defs.extend(subsets(c, super_models))
+
+    yield from declarations
+    yield from operation_defs
 
     yield ""
 
-    for c in classes:
-        yield from associations(c, overrides)
-        for line in subsets(c, super_models):
-            if line.startswith("from "):
-                if line not in already_imported:
-                    yield line
-                already_imported.add(line)
-            else:
+    for line in association_defs:
+        if line.startswith("from "):
+            if line not in already_imported:
                 yield line
+            already_imported.add(line)
+        else:
+            yield line
 
 
 def class_declaration(class_: UML.Class):
     base_classes = ", ".join(
-        c.name for c in sorted(bases(class_), key=lambda c: c.name)
+        [c.name for c in sorted(bases(class_), key=lambda c: c.name)]
     )
     return f"class {class_.name}({base_classes}):"
 
 
 def variables(class_: UML.Class, overrides: Overrides | None = None):
+    class_name = class_.name
     if class_.ownedAttribute:
         a: UML.Property
-        for a in sorted(class_.ownedAttribute, key=lambda a: a.name or ""):
+        for a in _sorted_attributes(class_):
             if is_extension_end(a):
                 continue
 
-            full_name = f"{class_.name}.{a.name}"
+            name = a.name
+            typ = a.type
+            full_name = _full_name(class_name, a)
             if overrides and overrides.has_override(full_name):
-                yield f"{a.name}: {overrides.get_type(full_name)}"
-            elif a.isDerived and not a.type:
+                yield f"{name}: {overrides.get_type(full_name)}"
+            elif a.isDerived and not typ:
                 log.warning(f"Derived attribute {full_name} has no implementation.")
-            elif a.typeValue:
-                yield f'{a.name}: _attribute[{a.typeValue}] = _attribute("{a.name}", {a.typeValue}{default_value(a)})'
-            elif is_enumeration(a.type):
-                assert isinstance(a.type, UML.Class)
-                enum_values = ", ".join(f'"{e.name}"' for e in a.type.ownedAttribute)
-                yield f'{a.name} = _enumeration("{a.name}", ({enum_values}), "{a.type.ownedAttribute[0].name}")'
-            elif a.type:
+            elif type_value := a.typeValue:
+                default = ""
+                if default_value := a.defaultValue:
+                    if type_value == "int":
+                        default_value = default_value.title()
+                    elif type_value == "str":
+                        if not (
+                            default_value[0] == default_value[-1]
+                            and default_value[0] in ('"', "'")
+                        ):
+                            default_value = f'"{default_value}"'
+                    else:
+                        raise ValueError(
+                            f"Unknown default value type: {a.owner.name}.{name}: {type_value} = {default_value}"
+                        )
+                    default = f", default={default_value}"
+                yield f'{name}: _attribute[{type_value}] = _attribute("{name}", {type_value}{default})'
+            elif is_enumeration(typ):
+                assert isinstance(typ, UML.Class)
+                literals = typ.ownedAttribute
+                enum_values = ", ".join([f'"{e.name}"' for e in literals])
+                yield f'{name} = _enumeration("{name}", ({enum_values}), "{literals[0].name}")'
+            elif typ:
                 mult = "one" if a.upper == "1" else "many"
                 comment = "  # type: ignore[assignment]" if is_reassignment(a) else ""
-                yield f"{a.name}: relation_{mult}[{a.type.name}]{comment}"
+                yield f"{name}: relation_{mult}[{typ.name}]{comment}"
             else:
                 assert isinstance(a.owner, UML.Element)
                 raise ValueError(
-                    f"{a.name}: {a.type} can not be written; owner={a.owner.name}"
+                    f"{name}: {typ} can not be written; owner={a.owner.name}"
                 )
 
     if class_.ownedOperation:
-        for o in sorted(class_.ownedOperation, key=lambda a: a.name or ""):
-            full_name = f"{class_.name}.{o.name}"
+        for o in _sorted_operations(class_):
+            full_name = _full_name(class_name, o)
             if overrides and overrides.has_override(full_name):
                 yield f"{o.name}: {overrides.get_type(full_name)}"
             else:
@@ -233,28 +282,42 @@ def associations(
     c: UML.Class,
     overrides: Overrides | None = None,
 ):
+    class_name = c.name
     redefinitions = []
     for a in c.ownedAttribute:
-        full_name = f"{c.name}.{a.name}"
-        if overrides and overrides.has_override(full_name):
-            yield overrides.get_override(full_name)
+        name = a.name
+        typ = a.type
+        full_name = _full_name(class_name, a)
+        if overrides and (override := overrides.get_override(full_name)) is not None:
+            yield override
         elif (
-            not a.type
-            or is_simple_type(a.type)
-            or is_enumeration(a.type)
-            or is_extension_end(a)
+            not typ or is_simple_type(typ) or is_enumeration(typ) or is_extension_end(a)
         ):
             continue
-        elif redefines(a):
+        elif redefinition := redefines(a):
             redefinitions.append(
-                f'{full_name} = redefine({c.name}, "{a.name}", {a.type.name}, {redefines(a)})'
+                f'{full_name} = redefine({class_name}, "{name}", {typ.name}, {redefinition})'
             )
-        elif a.isDerived:
-            yield f'{full_name} = derivedunion("{a.name}", {a.type.name}{lower(a)}{upper(a)})'
-        elif not a.name:
-            raise ValueError(f"Unnamed attribute: {full_name} ({a.association})")
         else:
-            yield f'{full_name} = association("{a.name}", {a.type.name}{lower(a)}{upper(a)}{composite(a)}{opposite(a)})'
+            lower_value = a.lowerValue
+            lower = "" if lower_value in (None, "0") else f", lower={lower_value}"
+            upper_value = a.upperValue
+            upper = "" if upper_value in (None, "*") else f", upper={upper_value}"
+            if a.isDerived:
+                yield f'{full_name} = derivedunion("{name}", {typ.name}{lower}{upper})'
+            elif not name:
+                raise ValueError(f"Unnamed attribute: {full_name} ({a.association})")
+            else:
+                composite = ", composite=True" if a.aggregation == "composite" else ""
+                opposite = ""
+                if (opp := a.opposite) is not None:
+                    opposite_name = opp.name
+                    if opposite_name and opp.class_:
+                        opposite = f', opposite="{opposite_name}"'
+                yield (
+                    f'{full_name} = association("{name}", {typ.name}'
+                    f"{lower}{upper}{composite}{opposite})"
+                )
 
     yield from redefinitions
 
@@ -263,6 +326,7 @@ def subsets(
     c: UML.Class,
     super_models: list[tuple[ModelingLanguage, ElementFactory]],
 ):
+    class_name = c.name
     for a in c.ownedAttribute:
         if (
             not a.type
@@ -271,103 +335,126 @@ def subsets(
             or is_extension_end(a)
         ):
             continue
-        for slot in a.appliedStereotype[:].slot:
-            if slot.definingFeature.name != "subsets":
-                continue
-
-            full_name = f"{c.name}.{a.name}"
-            for value in slot.value.split(","):
-                element_type, d = attribute(c, value.strip(), super_models)
-                if d and d.isDerived:
-                    if element_type:
-                        yield f"from {element_type.__module__} import {d.owner.name}"
-                    yield f"{d.owner.name}.{d.name}.add({full_name})  # type: ignore[attr-defined]"
-                elif not d:
-                    log.warning(
-                        f"{full_name} wants to subset {value.strip()}, but it is not defined"
-                    )
-                else:
-                    log.warning(
-                        f"{full_name} wants to subset {value.strip()}, but it is not a derived union"
-                    )
+        for stereotype in a.appliedStereotype:
+            for slot in stereotype.slot:  # type: ignore[attr-defined]
+                if slot.definingFeature.name != "subsets":
+                    continue
+
+                full_name = _full_name(class_name, a)
+                for value in slot.value.split(","):
+                    element_type, d = attribute(c, value.strip(), super_models)
+                    if d and d.isDerived:
+                        if element_type:
+                            yield f"from {element_type.__module__} import {d.owner.name}"
+                        yield f"{d.owner.name}.{d.name}.add({full_name})  # type: ignore[attr-defined]"
+                    elif not d:
+                        log.warning(
+                            f"{full_name} wants to subset {value.strip()}, but it is not defined"
+                        )
+                    else:
+                        log.warning(
+                            f"{full_name} wants to subset {value.strip()}, but it is not a derived union"
+                        )
 
 
 def operations(c: UML.Class, overrides: Overrides | None = None):
     if c.ownedOperation:
-        for o in sorted(c.ownedOperation, key=lambda a: a.name or ""):
-            full_name = f"{c.name}.{o.name}"
-            if overrides and overrides.has_override(full_name):
-                yield overrides.get_override(full_name)
+        class_name = c.name
+        for o in _sorted_operations(c):
+            full_name = _full_name(class_name, o)
+            if (
+                overrides
+                and (override := overrides.get_override(full_name)) is not None
+            ):
+                yield override
 
 
-def default_value(a):
-    if a.defaultValue:
-        if a.typeValue == "int":
-            defaultValue = a.defaultValue.title()
-        elif a.typeValue == "str":
-            if (a.defaultValue[0] == a.defaultValue[-1]) and (
-                a.defaultValue[0] in ['"', "'"]
-            ):
-                defaultValue = a.defaultValue
-            else:
-                defaultValue = f'"{a.defaultValue}"'
-        else:
-            raise ValueError(
-                f"Unknown default value type: {a.owner.name}.{a.name}: {a.typeValue} = {a.defaultValue}"
-            )
+def _name_key(el) -> str:
+    return el.name or ""
 
-        return f", default={defaultValue}"
-    return ""
 
+_full_names: dict[UML.Feature, str] = {}
 
-def lower(a):
-    return "" if a.lowerValue in (None, "0") else f", lower={a.lowerValue}"
 
+def _full_name(class_name: str | None, feature: UML.Feature) -> str:
+    name = _full_names.get(feature)
+    if name is None:
+        name = _full_names[feature] = f"{class_name}.{feature.name}"
+    return name
 
-def upper(a):
-    return "" if a.upperValue in (None, "*") else f", upper={a.upperValue}"
 
+_sorted_attributes_cache: dict[UML.Class, list[UML.Property]] = {}
+_sorted_operations_cache: dict[UML.Class, list[UML.Operation]] = {}
 
-def composite(a):
-    return ", composite=True" if a.aggregation == "composite" else ""
 
+def _sorted_attributes(c: UML.Class) -> list[UML.Property]:
+    attrs = _sorted_attributes_cache.get(c)
+    if attrs is None:
+        attrs = _sorted_attributes_cache[c] = sorted(c.ownedAttribute, key=_name_key)
+    return attrs
 
-def opposite(a):
-    return (
-        f', opposite="{a.opposite.name}"'
-        if a.opposite and a.opposite.name and a.opposite.class_
-        else ""
-    )
+
+def _sorted_operations(c: UML.Class) -> list[UML.Operation]:
+    ops = _sorted_operations_cache.get(c)
+    if ops is None:
+        ops = _sorted_operations_cache[c] = sorted(c.ownedOperation, key=_name_key)
+    return ops
 
 
 def order_classes(classes: Iterable[UML.Class]) -> Iterable[UML.Class]:
-    seen_classes = set()
+    seen_classes: dict[UML.Class, bool] = {}
 
-    def order(c):
-        if c not in seen_classes:
-            for b in bases(c):
-                yield from order(b)
-            yield c
-            seen_classes.add(c)
+    for root in classes:
+        stack = [(root, iter(bases(root)))]
+        while stack:
+            c, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                stack.pop()
+                if c not in seen_classes:
+                    seen_classes[c] = True
+                    yield c
+            elif nxt not in seen_classes:
+                stack.append((nxt, iter(bases(nxt))))
 
-    for c in classes:
-        yield from order(c)
+
+_bases_cache: dict[UML.Class, tuple[UML.Class, ...]] = {}
 
 
-def bases(c: UML.Class) -> Iterable[UML.Class]:
+def bases(c: UML.Class) -> tuple[UML.Class, ...]:
+    cached = _bases_cache.get(c)
+    if cached is not None:
+        return cached
+
+    generals = []
     for g in c.generalization:
         assert isinstance(g.general, UML.Class)
-        yield g.general
+        generals.append(g.general)
 
     for a in c.ownedAttribute:
         if a.association and a.name == "baseClass":
-            yield a.association.ownedEnd.class_  # type: ignore[attr-defined]
+            generals.append(a.association.ownedEnd.class_)  # type: ignore[attr-defined]
+
+    result = _bases_cache[c] = tuple(generals)
+    return result
+
+
+_enumerations_cache: dict[UML.Type, bool] = {}
 
 
 def is_enumeration(c: UML.Type) -> bool:
-    return c and c.name and (c.name.endswith("Kind") or c.name.endswith("Sort"))  # type: ignore[return-value]
+    if c is None:
+        return False
+    cached = _enumerations_cache.get(c)
+    if cached is None:
+        name = c.name
+        cached = _enumerations_cache[c] = bool(
+            name and (name.endswith("Kind") or name.endswith("Sort"))
+        )
+    return cached
 
 
+@functools.lru_cache(maxsize=None)
 def is_simple_type(c: UML.Type) -> bool:
     return any(
         s.name == "SimpleAttribute" for s in UML.recipes.get_applied_stereotypes(c)
@@ -383,65 +470,101 @@ def is_extension_end(a: UML.Property):
 
 
 def is_reassignment(a: UML.Property) -> bool:
-    def test(c: UML.Class):
-        for attr in c.ownedAttribute:
-            if attr.name == a.name:
-                return True
-        return any(test(base) for base in bases(c))
+    name = a.name
+    return any(
+        _attribute_cached(base, name, ())[1]
+        for base in bases(a.owner)  # type:ignore[arg-type]
+    )
 
-    return any(test(base) for base in bases(a.owner))  # type:ignore[arg-type]
 
+_in_profile_cache: dict[UML.Class, bool] = {}
 
-def is_in_profile(c: UML.Class) -> bool:
-    def test(p: UML.Package):
-        return isinstance(p, UML.Profile) or (p.owningPackage and test(p.owningPackage))
 
-    return test(c.owningPackage)  # type: ignore[no-any-return]
+def is_in_profile(c: UML.Class) -> bool:
+    cached = _in_profile_cache.get(c)
+    if cached is None:
+        cached = False
+        p = c.owningPackage
+        while p is not None:
+            if isinstance(p, UML.Profile):
+                cached = True
+                break
+            p = p.owningPackage
+        _in_profile_cache[c] = cached
+    return cached
 
 
 def is_in_toplevel_package(c: UML.Class, package_name: str) -> bool:
-    def test(p: UML.Package):
-        return (not p.owningPackage and p.name == package_name) or (
-            p.owningPackage and test(p.owningPackage)
-        )
+    p = c.owningPackage
+    while p is not None:
+        if not p.owningPackage:
+            return bool(p.name == package_name)
+        p = p.owningPackage
+    return False
 
-    return test(c.owningPackage)  # type: ignore[no-any-return]
+
+_redefines_cache: dict[UML.Property, str | None] = {}
 
 
 def redefines(a: UML.Property) -> str | None:
-    return next(
-        (
-            slot.value
-            for slot in a.appliedStereotype[:].slot
-            if slot.definingFeature.name == "redefines"
-        ),
-        None,
-    )
+    if a in _redefines_cache:
+        return _redefines_cache[a]
+    value = None
+    stereotypes = a.appliedStereotype
+    if len(stereotypes):
+        value = next(
+            (
+                slot.value
+                for stereotype in stereotypes
+                for slot in stereotype.slot  # type: ignore[attr-defined]
+                if slot.definingFeature.name == "redefines"
+            ),
+            None,
+        )
+    _redefines_cache[a] = value
+    return value
 
 
 def attribute(
     c: UML.Class, name: str, super_models: list[tuple[ModelingLanguage, ElementFactory]]
 ) -> tuple[type[Element] | None, UML.Property | None]:
-    a: UML.Property | None
-    for a in c.ownedAttribute:
-        if a.name == name:
-            return None, a
+    return _attribute_cached(c, name, tuple(super_models))
+
+
+@functools.lru_cache(maxsize=None)
+def _attribute_cached(
+    c: UML.Class,
+    name: str,
+    super_models: tuple[tuple[ModelingLanguage, ElementFactory], ...],
+) -> tuple[type[Element] | None, UML.Property | None]:
+    a = _owned_attributes_by_name(c).get(name)
+    if a is not None:
+        return None, a
 
     for base in bases(c):
-        element_type, a = attribute(base, name, super_models)
+        element_type, a = _attribute_cached(base, name, super_models)
         if a:
             return element_type, a
 
     element_type, super_class = in_super_model(c.name, super_models)
     if super_class and c is not super_class:
-        _, a = attribute(super_class, name, super_models)
+        _, a = _attribute_cached(super_class, name, super_models)
         return element_type, a
 
     return None, None
 
 
+@functools.lru_cache(maxsize=None)
+def _owned_attributes_by_name(c: UML.Class) -> dict[str | None, UML.Property]:
+    attrs: dict[str | None, UML.Property] = {}
+    for a in c.ownedAttribute:
+        if a.name not in attrs:
+            attrs[a.name] = a
+    return attrs
+
+
 def in_super_model(
-    name: str, super_models: list[tuple[ModelingLanguage, ElementFactory]]
+    name: str, super_models: Iterable[tuple[ModelingLanguage, ElementFactory]]
 ) -> tuple[type[Element], UML.Class] | tuple[None, None]:
     for modeling_language, factory in super_models:
         cls: UML.Class
@@ -459,6 +582,10 @@ def in_super_model(
 
 def resolve_attribute_type_values(element_factory: ElementFactory) -> None:
     """Some model updates that are hard to do from Gaphor itself."""
+    classes_by_name: dict[str | None, UML.Class] = {}
+    for cls in element_factory.select(UML.Class):
+        classes_by_name.setdefault(cls.name, cls)
+
     for prop in element_factory.select(UML.Property):
         if prop.typeValue in ("String", "str", "object"):
             prop.typeValue = "str"
@@ -470,13 +597,8 @@ def resolve_attribute_type_values(element_factory: ElementFactory) -> None:
             "UnlimitedNatural",
         ):
             prop.typeValue = "int"
-        elif c := next(
-            element_factory.select(
-                lambda e: isinstance(e, UML.Class) and e.name == prop.typeValue  # noqa: B023
-            ),
-            None,
-        ):
-            prop.type = c  # type: ignore[assignment]
+        elif c := classes_by_name.get(prop.typeValue):
+            prop.type = c
             del prop.typeValue
             prop.aggregation = "composite"
 
@@ -83,10 +83,10 @@ class Overrides:
     def has_override(self, key):
         return key in self.overrides
 
-    def get_override(self, key):
+    def get_override(self, key, default=None):
         """Write override data for 'key' to a file referred to by 'fp'."""
         _deps, _type_hint, data, line = self.overrides.get(key, ((), None, None, None))
-        return f"# {line}{data}" if data else None
+        return f"# {line}{data}" if data else default
 
     def get_type(self, key):
         return self.overrides.get(key, (None, "Any"))[1]